@@ -1,5 +1,11 @@
-from abc import ABC, abstractmethod
-from collections import deque
+import sys
+from array import array
+from collections import OrderedDict, deque
+from heapq import heapify, heappop, heappush
+from itertools import zip_longest
+from typing import Callable
+
+ALPHABET_INDEXES = dict((alpha, idx) for idx, alpha in enumerate("абвгдеёжзийклмнопрстуфхцчшщъыьэюя"))
 
 
 class MemoryAccessor:
@@ -7,424 +13,488 @@ class MemoryAccessor:
         self.pid = pid
 
         self._accesses = [f"{pid}{page}" for page in accesses]
-        self._idx = -1
+        self._iterator = iter(self._accesses)
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        self._idx += 1
-        return self._accesses[self._idx] if self._idx < len(self._accesses) else None
+        return next(self._iterator, None)
 
 
-class PageFault(Exception):
-    pass
+class PhysicsMemory:
+    __slots__ = ("size",)
 
+    # None means the memory does no per-access work; simulate() checks for it before calling tick
+    tick: Callable[[], None] | None = None
 
-class PhysicsMemory(ABC):
     def __init__(self, size: int):
         self.size = size
 
-    @abstractmethod
     def __str__(self):
-        pass
-
-    @abstractmethod
-    def contains(self, pid: str, page_id: str) -> bool:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def is_free(self) -> bool:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
-    def use(self, pid: str, page_id: str) -> None:
-        pass
+    def use(self, pid: str, page_id: str) -> bool:
+        raise NotImplementedError
 
-    @abstractmethod
     def swap(self, pid: str) -> str:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def allocate(self, pid: str, page_id: str) -> None:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
-    def tick(self) -> None:
-        pass
+
+def get_next_pointers(pages: list[str]) -> array:
+    next_pointers = array("q", [len(pages)]) * len(pages)
+    last_pointers = dict()
+
+    for pointer in range(len(pages) - 1, -1, -1):
+        page_id = pages[pointer]
+        next_pointers[pointer] = last_pointers.get(page_id, len(pages))
+        last_pointers[page_id] = pointer
+
+    return next_pointers
+
+
+def get_distance(pointer: int, page_pointer: int, pages_count: int) -> int | float:
+    return pointer - page_pointer if pointer < pages_count else float("inf")
+
+
+def get_deferred_pages(memory: dict[str, int]) -> list[tuple[int, str]]:
+    deferred_pages = [(-pointer, page_id) for page_id, pointer in memory.items()]
+    heapify(deferred_pages)
+
+    return deferred_pages
+
+
+def pop_most_deferred_page(deferred_pages: list[tuple[int, str]], memory: dict[str, int]) -> str:
+    while True:
+        pointer, page_id = heappop(deferred_pages)
+
+        if memory.get(page_id) == -pointer:
+            return page_id
+
+
+def get_frequencies(memory: dict[str, int], allocations: dict[str, int]) -> list[tuple[int, int, str]]:
+    frequencies = [(frequency, allocations[page_id], page_id) for page_id, frequency in memory.items()]
+    heapify(frequencies)
+
+    return frequencies
+
+
+def pop_not_frequency_page(
+        frequencies: list[tuple[int, int, str]], memory: dict[str, int], allocations: dict[str, int]
+) -> str:
+    while True:
+        frequency, allocation, page_id = heappop(frequencies)
+
+        if memory.get(page_id) == frequency and allocations[page_id] == allocation:
+            return page_id
 
 
 class GlobalOptMemory(PhysicsMemory):
+    __slots__ = ("_accesses", "_next_pointers", "_page_pointer", "_memory", "_deferred_pages")
+
     def __init__(self, accesses: list[str], size: int):
         super(GlobalOptMemory, self).__init__(size)
 
         self._accesses = accesses
-        self._pages = set(self._accesses)
+        self._next_pointers = get_next_pointers(self._accesses)
         self._page_pointer = -1
-        self._memory = set()
-        self._pointers_count = dict()
+        self._memory = dict()
+        self._deferred_pages = list()
 
     def __str__(self):
-        return str(dict((page, count) for page, count in self._pointers_count.items() if page in self._memory))
-
-    def contains(self, pid: str, page_id: str) -> bool:
-        return page_id in self._memory
+        return str(
+            dict((page, get_distance(pointer, self._page_pointer, len(self._accesses)))
+                 for page, pointer in self._memory.items())
+        )
 
     def is_free(self) -> bool:
         return len(self._memory) < self.size
 
-    def use(self, pid: str, page_id: str) -> None:
-        if page_id not in self._memory:
-            raise PageFault
+    def use(self, pid: str, page_id: str) -> bool:
+        return page_id in self._memory
 
     def swap(self, pid: str) -> str:
-        pointers_in_memory = [(page, count) for page, count in self._pointers_count.items() if page in self._memory]
-        most_deferred_page = max(pointers_in_memory, key=lambda p: p[1])[0]
+        most_deferred_page = pop_most_deferred_page(self._deferred_pages, self._memory)
 
-        self._memory.remove(most_deferred_page)
+        del self._memory[most_deferred_page]
 
         return most_deferred_page
 
     def allocate(self, pid: str, page_id: str) -> None:
-        self._memory.add(page_id)
+        self._memory[page_id] = self._page_pointer
 
     def tick(self) -> None:
         self._page_pointer += 1
-        for page_id in self._pages:
-            try:
-                next_idx = self._get_next_index(self._accesses, page_id, self._page_pointer)
-                self._pointers_count[page_id] = next_idx - self._page_pointer
-            except ValueError:
-                self._pointers_count[page_id] = float("inf")
 
-    @staticmethod
-    def _get_next_index(pages: list[str], page_id: str, start: int) -> int:
-        return pages.index(page_id, start)
+        if self._page_pointer > 0:
+            prev_pointer = self._page_pointer - 1
+            page_id, next_pointer = self._accesses[prev_pointer], self._next_pointers[prev_pointer]
+
+            self._memory[page_id] = next_pointer
+            heappush(self._deferred_pages, (-next_pointer, page_id))
+
+            if len(self._deferred_pages) > 2 * self.size:
+                self._deferred_pages = get_deferred_pages(self._memory)
 
 
 class GlobalFifoMemory(PhysicsMemory):
+    __slots__ = ("_memory", "_pages")
+
     def __init__(self, size: int):
         super(GlobalFifoMemory, self).__init__(size)
         self._memory = deque()
+        self._pages = set()
 
     def __str__(self):
         return str(self._memory)
 
-    def contains(self, pid: str, page_id: str) -> bool:
-        return page_id in self._memory
-
     def is_free(self) -> bool:
         return len(self._memory) < self.size
 
-    def use(self, pid: str, page_id: str) -> None:
-        if page_id not in self._memory:
-            raise PageFault
+    def use(self, pid: str, page_id: str) -> bool:
+        return page_id in self._pages
 
     def swap(self, pid: str) -> str:
-        return self._memory.popleft()
+        old_page = self._memory.popleft()
+        self._pages.remove(old_page)
+
+        return old_page
 
     def allocate(self, pid: str, page_id: str) -> None:
         self._memory.append(page_id)
-
-    def tick(self) -> None:
-        pass
+        self._pages.add(page_id)
 
 
 class GlobalLfuMemory(PhysicsMemory):
+    __slots__ = ("_memory", "_allocations", "_allocations_count", "_frequencies")
+
     def __init__(self, size: int):
         super(GlobalLfuMemory, self).__init__(size)
         self._memory = dict()
+        self._allocations = dict()
+        self._allocations_count = 0
+        self._frequencies = list()
 
     def __str__(self):
         return str(self._memory)
 
-    def contains(self, pid: str, page_id: str) -> bool:
-        return page_id in self._memory
-
     def is_free(self) -> bool:
         return len(self._memory) < self.size
 
-    def use(self, pid: str, page_id: str) -> None:
+    def use(self, pid: str, page_id: str) -> bool:
         if page_id not in self._memory:
-            raise PageFault
+            return False
 
         self._memory[page_id] += 1
+        heappush(self._frequencies, (self._memory[page_id], self._allocations[page_id], page_id))
+
+        if len(self._frequencies) > 2 * self.size:
+            self._frequencies = get_frequencies(self._memory, self._allocations)
+
+        return True
 
     def swap(self, pid: str) -> str:
-        not_frequency_page = min(self._memory.items(), key=lambda p: p[1])[0]
+        not_frequency_page = pop_not_frequency_page(self._frequencies, self._memory, self._allocations)
         del self._memory[not_frequency_page]
+        del self._allocations[not_frequency_page]
 
         return not_frequency_page
 
     def allocate(self, pid: str, page_id: str) -> None:
+        self._allocations_count += 1
         self._memory[page_id] = 1
-
-    def tick(self) -> None:
-        pass
+        self._allocations[page_id] = self._allocations_count
+        heappush(self._frequencies, (1, self._allocations_count, page_id))
 
 
 class GlobalLruMemory(PhysicsMemory):
+    __slots__ = ("_memory", "_recency", "_clock")
+
     def __init__(self, size: int):
         super(GlobalLruMemory, self).__init__(size)
         self._memory = dict()
+        self._recency = OrderedDict()
+        self._clock = 0
 
     def __str__(self):
-        return str(self._memory)
-
-    def contains(self, pid: str, page_id: str) -> bool:
-        return page_id in self._memory
+        return str(dict((page, self._clock - used_at) for page, used_at in self._memory.items()))
 
     def is_free(self) -> bool:
         return len(self._memory) < self.size
 
-    def use(self, pid: str, page_id: str) -> None:
+    def use(self, pid: str, page_id: str) -> bool:
         if page_id not in self._memory:
-            raise PageFault
+            return False
+
+        self._memory[page_id] = self._clock
+        self._recency.move_to_end(page_id)
 
-        self._memory[page_id] = 0
+        return True
 
     def swap(self, pid: str) -> str:
-        old_page = max(self._memory.items(), key=lambda p: p[1])[0]
+        old_page, _ = self._recency.popitem(last=False)
         del self._memory[old_page]
 
         return old_page
 
     def allocate(self, pid: str, page_id: str) -> None:
-        self._memory[page_id] = 0
+        self._memory[page_id] = self._clock
+        self._recency[page_id] = None
 
     def tick(self) -> None:
-        for page in self._memory.keys():
-            self._memory[page] += 1
+        self._clock += 1
 
 
 class LocalOptMemory(PhysicsMemory):
+    __slots__ = ("_memory", "_owners", "_deferred_pages", "_page_pointer", "_accesses", "_next_pointers")
+
     def __init__(self, pids: list[str], accesses: list[str], size: int):
         super(LocalOptMemory, self).__init__(size)
 
-        self._memory = dict((pid, set()) for pid in pids)
-        self._pointers_count = dict()
+        self._memory = dict((pid, dict()) for pid in pids)
+        self._owners = dict()
+        self._deferred_pages = dict((pid, list()) for pid in pids)
         self._page_pointer = -1
-        self._pages = set(accesses)
         self._accesses = accesses
+        self._next_pointers = get_next_pointers(self._accesses)
 
     def __str__(self):
         return str(
-            [dict((page, count) for page, count in self._pointers_count.items() if page in local)
+            [dict((page, get_distance(pointer, self._page_pointer, len(self._accesses)))
+                  for page, pointer in local.items())
              for local in self._memory.values()]
         )
 
-    def contains(self, pid: str, page_id: str) -> bool:
-        return page_id in self._memory[pid]
-
     def is_free(self) -> bool:
         return sum(len(local) for local in self._memory.values()) < self.size
 
-    def use(self, pid: str, page_id: str) -> None:
-        if page_id not in self._memory[pid]:
-            raise PageFault
+    def use(self, pid: str, page_id: str) -> bool:
+        return page_id in self._memory[pid]
 
     def swap(self, pid: str) -> str:
         local = self._memory[pid]
 
-        pointers_in_memory = [(page, count) for page, count in self._pointers_count.items() if page in local]
-        most_deferred_page = max(pointers_in_memory, key=lambda p: p[1])[0]
+        most_deferred_page = pop_most_deferred_page(self._deferred_pages[pid], local)
 
-        local.remove(most_deferred_page)
+        del local[most_deferred_page]
 
         return most_deferred_page
 
     def allocate(self, pid: str, page_id: str) -> None:
-        self._memory[pid].add(page_id)
+        self._memory[pid][page_id] = self._page_pointer
+        self._owners[page_id] = pid
 
     def tick(self) -> None:
         self._page_pointer += 1
 
-        for page_id in self._pages:
-            try:
-                next_idx = self._get_next_index(self._accesses, page_id, self._page_pointer)
-                self._pointers_count[page_id] = next_idx - self._page_pointer
-            except ValueError:
-                self._pointers_count[page_id] = float("inf")
+        if self._page_pointer > 0:
+            prev_pointer = self._page_pointer - 1
+            page_id, next_pointer = self._accesses[prev_pointer], self._next_pointers[prev_pointer]
 
-    @staticmethod
-    def _get_next_index(pages: list[str], page_id: str, start: int) -> int:
-        return pages.index(page_id, start)
+            pid = self._owners[page_id]
+
+            self._memory[pid][page_id] = next_pointer
+            heappush(self._deferred_pages[pid], (-next_pointer, page_id))
+
+            if len(self._deferred_pages[pid]) > 2 * self.size:
+                self._deferred_pages[pid] = get_deferred_pages(self._memory[pid])
 
 
 class LocalFifoMemory(PhysicsMemory):
+    __slots__ = ("_memory", "_pages")
+
     def __init__(self, pids: list[str], size: int):
         super(LocalFifoMemory, self).__init__(size)
         self._memory = dict((pid, deque()) for pid in pids)
+        self._pages = dict((pid, set()) for pid in pids)
 
     def __str__(self):
         return str([deq for deq in self._memory.values()])
 
-    def contains(self, pid: str, page_id: str) -> bool:
-        return page_id in self._memory[pid]
-
     def is_free(self) -> bool:
         return sum(len(deq) for deq in self._memory.values()) < self.size
 
-    def use(self, pid: str, page_id: str) -> None:
-        if page_id not in self._memory[pid]:
-            raise PageFault
+    def use(self, pid: str, page_id: str) -> bool:
+        return page_id in self._pages[pid]
 
     def swap(self, pid: str) -> str:
-        return self._memory[pid].popleft()
+        old_page = self._memory[pid].popleft()
+        self._pages[pid].remove(old_page)
+
+        return old_page
 
     def allocate(self, pid: str, page_id: str) -> None:
         self._memory[pid].append(page_id)
-
-    def tick(self) -> None:
-        pass
+        self._pages[pid].add(page_id)
 
 
 class LocalLfuMemory(PhysicsMemory):
+    __slots__ = ("_memory", "_allocations", "_allocations_count", "_frequencies")
+
     def __init__(self, pids: list[str], size: int):
         super(LocalLfuMemory, self).__init__(size)
         self._memory = dict((pid, dict()) for pid in pids)
+        self._allocations = dict()
+        self._allocations_count = 0
+        self._frequencies = dict((pid, list()) for pid in pids)
 
     def __str__(self):
         return str([local for local in self._memory.values()])
 
-    def contains(self, pid: str, page_id: str) -> bool:
-        return page_id in self._memory[pid]
-
     def is_free(self) -> bool:
         return sum(len(local) for local in self._memory.values()) < self.size
 
-    def use(self, pid: str, page_id: str) -> None:
+    def use(self, pid: str, page_id: str) -> bool:
         local = self._memory[pid]
 
         if page_id not in local:
-            raise PageFault
+            return False
 
         local[page_id] += 1
+        heappush(self._frequencies[pid], (local[page_id], self._allocations[page_id], page_id))
+
+        if len(self._frequencies[pid]) > 2 * self.size:
+            self._frequencies[pid] = get_frequencies(local, self._allocations)
+
+        return True
 
     def swap(self, pid: str) -> str:
         local = self._memory[pid]
 
-        not_frequency_page = min(local.items(), key=lambda p: p[1])[0]
+        not_frequency_page = pop_not_frequency_page(self._frequencies[pid], local, self._allocations)
         del local[not_frequency_page]
+        del self._allocations[not_frequency_page]
 
         return not_frequency_page
 
     def allocate(self, pid: str, page_id: str) -> None:
+        self._allocations_count += 1
         self._memory[pid][page_id] = 1
-
-    def tick(self) -> None:
-        pass
+        self._allocations[page_id] = self._allocations_count
+        heappush(self._frequencies[pid], (1, self._allocations_count, page_id))
 
 
 class LocalLruMemory(PhysicsMemory):
+    __slots__ = ("_memory", "_recency", "_clock")
+
     def __init__(self, pids: list[str], size: int):
         super(LocalLruMemory, self).__init__(size)
         self._memory = dict((pid, dict()) for pid in pids)
+        self._recency = dict((pid, OrderedDict()) for pid in pids)
+        self._clock = 0
 
     def __str__(self):
-        return str([local for local in self._memory.values()])
-
-    def contains(self, pid: str, page_id: str) -> bool:
-        return page_id in self._memory[pid]
+        return str(
+            [dict((page, self._clock - used_at) for page, used_at in local.items())
+             for local in self._memory.values()]
+        )
 
     def is_free(self) -> bool:
         return sum(len(local) for local in self._memory.values()) < self.size
 
-    def use(self, pid: str, page_id: str) -> None:
+    def use(self, pid: str, page_id: str) -> bool:
         local = self._memory[pid]
 
         if page_id not in local:
-            raise PageFault
+            return False
+
+        local[page_id] = self._clock
+        self._recency[pid].move_to_end(page_id)
 
-        local[page_id] = 0
+        return True
 
     def swap(self, pid: str) -> str:
         local = self._memory[pid]
 
-        old_page = max(local.items(), key=lambda p: p[1])[0]
+        old_page, _ = self._recency[pid].popitem(last=False)
         del local[old_page]
 
         return old_page
 
     def allocate(self, pid: str, page_id: str) -> None:
-        self._memory[pid][page_id] = 0
+        self._memory[pid][page_id] = self._clock
+        self._recency[pid][page_id] = None
 
     def tick(self) -> None:
-        for local in self._memory.values():
-            for key in local.keys():
-                local[key] += 1
+        self._clock += 1
+
 
+def simulate(accessors: list[MemoryAccessor], memory: PhysicsMemory, verbose: bool = True) -> None:
+    output = [f"{memory.__class__.__name__}\n"]
+    write = output.append
 
-def simulate(accessors: list[MemoryAccessor], memory: PhysicsMemory) -> None:
-    print(memory.__class__.__name__)
     page_faults_count = 0
-    finished_accessors = set()
+    finished_accessors = 0
+    all_accessors = (1 << len(accessors)) - 1
 
-    while len(finished_accessors) < len(accessors):
-        for accessor in filter(lambda accessor_: accessor_ not in finished_accessors, accessors):
-            page_id: str = next(accessor)
+    tick, is_free, use = memory.tick, memory.is_free, memory.use
+    swap, allocate = memory.swap, memory.allocate
 
-            if page_id is None:
-                finished_accessors.add(accessor)
-                continue
+    try:
+        while finished_accessors != all_accessors:
+            for idx, accessor in enumerate(accessors):
+                if finished_accessors & (1 << idx):
+                    continue
 
-            print(f"{page_id} -> ", end="")
+                page_id: str = next(accessor)
 
-            memory.tick()
+                if page_id is None:
+                    finished_accessors |= 1 << idx
+                    continue
 
-            if memory.is_free() and not memory.contains(accessor.pid, page_id):
-                print(memory, "= ALLOCATION")
-                memory.allocate(accessor.pid, page_id)
-                continue
+                if tick is not None:
+                    tick()
 
-            try:
-                memory.use(accessor.pid, page_id)
-                print(memory)
-            except PageFault:
-                print(memory, "= PAGE FAULT -> ", end="")
+                if use(accessor.pid, page_id):
+                    if verbose:
+                        write(f"{page_id} -> {memory}\n")
+                    continue
 
-                page_faults_count += 1
-                swapped_page = memory.swap(accessor.pid)
-                memory.allocate(accessor.pid, page_id)
+                if is_free():
+                    if verbose:
+                        write(f"{page_id} -> {memory} = ALLOCATION\n")
+                    allocate(accessor.pid, page_id)
+                    continue
+
+                if verbose:
+                    write(f"{page_id} -> {memory} = PAGE FAULT -> ")
 
-                print(swapped_page)
+                page_faults_count += 1
+                swapped_page = swap(accessor.pid)
+                allocate(accessor.pid, page_id)
 
-    print(f"PAGE FAULTS: {page_faults_count}\n")
+                if verbose:
+                    write(f"{swapped_page}\n")
 
+        write(f"PAGE FAULTS: {page_faults_count}\n\n")
+    finally:
+        sys.stdout.write("".join(output))
 
-def get_accessor_from_name(pid: str, name_in: str) -> MemoryAccessor:
-    alphabet = "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
 
+def get_pages_from_name(name_in: str) -> list[int]:
     parsed = _, name, _ = name_in.lower().split()
     full_name = "".join(parsed)
 
     pages_count = len(name)
-    pages = list(filter(lambda v: v > 0, ((alphabet.index(alpha) + 1) % pages_count for alpha in full_name)))
 
-    return MemoryAccessor(pid, pages)
+    return [page for page in ((ALPHABET_INDEXES[alpha] + 1) % pages_count for alpha in full_name) if page > 0]
 
 
-def get_accessors(pids: list[str], prev_name: str, name: str, next_name: str) -> list[MemoryAccessor]:
-    return [
-        get_accessor_from_name(pids[0], prev_name),
-        get_accessor_from_name(pids[1], name),
-        get_accessor_from_name(pids[2], next_name)
-    ]
+def get_accessors(pids: list[str], pages: list[list[int]]) -> list[MemoryAccessor]:
+    return [MemoryAccessor(pid, pid_pages) for pid, pid_pages in zip(pids, pages)]
 
 
 def get_row_vector_from_accessors(accessors: list[MemoryAccessor]) -> list[str]:
     vector = list()
-    finished_accessors = set()
-
-    while len(finished_accessors) < len(accessors):
-        for accessor in filter(lambda accessor_: accessor_ not in finished_accessors, accessors):
-            page_id: str = next(accessor)
 
-            if page_id is None:
-                finished_accessors.add(accessor)
-                continue
-
-            vector.append(page_id)
+    for page_ids in zip_longest(*(accessor._accesses for accessor in accessors)):
+        vector.extend(page_id for page_id in page_ids if page_id is not None)
 
     return vector
 
@@ -433,24 +503,23 @@ def main():
     prev_name, name, next_name = (input() for _ in range(3))
 
     pids = ["A", "B", "C"]
+    pages = [get_pages_from_name(name_in) for name_in in (prev_name, name, next_name)]
+    row_vector = get_row_vector_from_accessors(get_accessors(pids, pages))
+
     memory_size = 10
     memories = [
-        GlobalOptMemory(
-            get_row_vector_from_accessors(get_accessors(pids, prev_name, name, next_name)), memory_size
-        ),
+        GlobalOptMemory(row_vector, memory_size),
         GlobalFifoMemory(memory_size),
         GlobalLfuMemory(memory_size),
         GlobalLruMemory(memory_size),
-        LocalOptMemory(
-            pids, get_row_vector_from_accessors(get_accessors(pids, prev_name, name, next_name)), memory_size
-        ),
+        LocalOptMemory(pids, row_vector, memory_size),
         LocalFifoMemory(pids, memory_size),
         LocalLfuMemory(pids, memory_size),
         LocalLruMemory(pids, memory_size),
     ]
 
     for memory in memories:
-        simulate(get_accessors(pids, prev_name, name, next_name), memory)
+        simulate(get_accessors(pids, pages), memory)
 
 
 if __name__ == "__main__":